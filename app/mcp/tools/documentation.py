@@ -2,27 +2,53 @@
 
 Created by Sameer
 """
+import io
 import os
 import json
+import hashlib
 import logging
 from datetime import datetime
 from typing import Optional, List
+from xml.sax.saxutils import escape
 
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; stdlib json is used otherwise
+    orjson = None
 
 from app.mcp.server import register_tool
 from app.services.salesforce import get_salesforce_connection
+from app.utils.cache import get_cache
 
 logger = logging.getLogger(__name__)
 
 # Documents save path
-DOCS_SAVE_PATH = os.getenv(
+DOCS_SAVE_PATH = os.path.abspath(os.getenv(
     "SFMCP_DOCS_PATH",
     os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "documents")
-)
+))
+
+# Created once here rather than on every tool call; _save_document recreates it if removed later
+try:
+    os.makedirs(DOCS_SAVE_PATH, exist_ok=True)
+except OSError as e:
+    logger.warning("Could not create documents directory %s: %s", DOCS_SAVE_PATH, e)
+
+# How long an object's describe() result is reused for schema docs (seconds).
+# A bad value falls back to the default rather than failing every tool import.
+try:
+    DESCRIBE_CACHE_TTL = float(os.getenv("SFMCP_DESCRIBE_CACHE_TTL", "300"))
+except ValueError:
+    logger.warning("Invalid SFMCP_DESCRIBE_CACHE_TTL=%r; using 300s",
+                   os.getenv("SFMCP_DESCRIBE_CACHE_TTL"))
+    DESCRIBE_CACHE_TTL = 300.0
 
 
 # ── Styling helpers ────────────────────────────────────────────────────────────
@@ -31,117 +57,184 @@ NAVY = RGBColor(0x1B, 0x2A, 0x4A)
 BLUE = RGBColor(0x2E, 0x75, 0xB6)
 GRAY = RGBColor(0x58, 0x58, 0x58)
 WHITE = RGBColor(0xFF, 0xFF, 0xFF)
+DIVIDER_GRAY = RGBColor(0xCC, 0xCC, 0xCC)
 LIGHT_BG = "E8EDF3"
 HEADER_BG = "1B2A4A"
 
+# Indexed by a bool: one tuple load per schema cell instead of a conditional
+_YES_NO = ("No", "Yes")
+
+# Font sizes / spacing, built once instead of per run
+_PT11 = Pt(11)
+_PT12 = Pt(12)
+_PT13 = Pt(13)
+_PT14 = Pt(14)
+_PT16 = Pt(16)
+_PT22 = Pt(22)
+_PT28 = Pt(28)
+_PT120 = Pt(120)
+
+# Banded table style: header and alternating row fills come from the style,
+# so cells carry no per-cell <w:shd>
+BANDED_TABLE_STYLE = "SF Banded"
+_BANDED_STYLE_ID = "SFBanded"
+_BANDED_STYLE_XML = (
+    '<w:style {nsdecls} w:type="table" w:customStyle="1" w:styleId="{style_id}">'
+    '<w:name w:val="{name}"/><w:basedOn w:val="TableNormal"/><w:uiPriority w:val="99"/>'
+    '<w:tblPr><w:tblStyleRowBandSize w:val="1"/></w:tblPr>'
+    '<w:tblStylePr w:type="firstRow"><w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{header}"/></w:tcPr></w:tblStylePr>'
+    '<w:tblStylePr w:type="band1Horz"><w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{band1}"/></w:tcPr></w:tblStylePr>'
+    '<w:tblStylePr w:type="band2Horz"><w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="FFFFFF"/></w:tcPr></w:tblStylePr>'
+    '</w:style>'
+).format(nsdecls=nsdecls('w'), style_id=_BANDED_STYLE_ID, name=BANDED_TABLE_STYLE, header=HEADER_BG, band1=LIGHT_BG)
+
+
+def _build_template():
+    """python-docx's blank template plus the banded table style, as .docx bytes."""
+    doc = Document()
+    doc.styles.element.append(parse_xml(_BANDED_STYLE_XML))
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# Built once so each document skips the disk read and the style setup
+_TEMPLATE_BYTES = _build_template()
+
+# Table cell markup, split around the cell text so rows are plain string joins
+_CELL_HEAD_TMPL = (
+    '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    '<w:p><w:r><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/>'
+    '<w:color w:val="{color}"/><w:sz w:val="20"/></w:rPr><w:t xml:space="preserve">'
+)
+_HEADER_CELL_HEAD_TMPL = (
+    '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/>'
+    '<w:b/><w:color w:val="{color}"/><w:sz w:val="20"/></w:rPr><w:t xml:space="preserve">'
+)
+_CELL_TAIL = '</w:t></w:r></w:p></w:tc>'
 
-def _style_heading(paragraph, color=NAVY, size=14):
-    """Apply consistent styling to a heading."""
-    for run in paragraph.runs:
-        run.font.color.rgb = color
-        run.font.size = Pt(size)
-        run.font.name = "Arial"
+# Bullet paragraph markup; "ListBullet" is the style id of the bundled template
+_BULLET_HEAD = (
+    '<w:p><w:pPr><w:pStyle w:val="ListBullet"/></w:pPr>'
+    '<w:r><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/>'
+    '<w:color w:val="{color}"/><w:sz w:val="22"/></w:rPr><w:t xml:space="preserve">'
+).format(color=GRAY)
+_P_TAIL = '</w:t></w:r></w:p>'
+
+# Divider paragraph: 4pt before / 8pt after, 6pt light-gray underscores
+_DIVIDER_XML = (
+    '<w:p><w:pPr><w:spacing w:before="80" w:after="160"/></w:pPr>'
+    '<w:r><w:rPr><w:color w:val="{color}"/><w:sz w:val="12"/></w:rPr>'
+    '<w:t>{line}</w:t></w:r></w:p>'
+).format(color=DIVIDER_GRAY, line="_" * 80)
+
+
+_HEADING_SIZES = {0: _PT22, 1: _PT16, 2: _PT13}
+_HEADING_COLORS = {0: NAVY, 1: NAVY, 2: BLUE}
+
+
+def _heading_xml(text, level=1):
+    """Render a styled heading paragraph ("Title" for level 0, else "Heading N")."""
+    style_id = "Title" if level == 0 else f"Heading{level}"
+    color = _HEADING_COLORS.get(level, NAVY)
+    half_points = int(_HEADING_SIZES.get(level, _PT14).pt * 2)
+    return (
+        f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>'
+        f'<w:r><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/>'
+        f'<w:color w:val="{color}"/><w:sz w:val="{half_points}"/></w:rPr>'
+        f'<w:t xml:space="preserve">{_run_text_xml(text)}</w:t></w:r></w:p>'
+    )
 
 
 def _add_styled_heading(doc, text, level=1):
     """Add a heading with consistent styling."""
-    h = doc.add_heading(text, level=level)
-    sizes = {0: 22, 1: 16, 2: 13}
-    colors = {0: NAVY, 1: NAVY, 2: BLUE}
-    _style_heading(h, color=colors.get(level, NAVY), size=sizes.get(level, 14))
-    return h
+    _append_xml(doc, _heading_xml(text, level))
 
 
 def _add_body_text(doc, text):
     """Add a styled body paragraph."""
-    p = doc.add_paragraph(text)
-    for run in p.runs:
-        run.font.name = "Arial"
-        run.font.size = Pt(11)
-        run.font.color.rgb = GRAY
+    p = doc.add_paragraph()
+    font = p.add_run(text).font
+    font.name = "Arial"
+    font.size = _PT11
+    font.color.rgb = GRAY
     return p
 
 
-def _add_bullet(doc, text):
-    """Add a styled bullet point."""
-    p = doc.add_paragraph(text, style="List Bullet")
-    for run in p.runs:
-        run.font.name = "Arial"
-        run.font.size = Pt(11)
-        run.font.color.rgb = GRAY
-    return p
+def _run_text_xml(text):
+    """Escape text for a <w:t>, mapping tabs and line breaks like add_run()."""
+    text = escape(str(text))
+    if "\t" in text or "\n" in text or "\r" in text:
+        text = (text.replace("\r\n", "\n").replace("\r", "\n")
+                .replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+                .replace("\n", '</w:t><w:br/><w:t xml:space="preserve">'))
+    return text
+
+
+def _render_row_xml(row_data, cell_heads):
+    """Render one data row as a <w:tr> string using per-column cell prefixes."""
+    return "<w:tr>" + "".join(
+        cell_heads[col_idx] + _run_text_xml(cell_text) + _CELL_TAIL
+        for col_idx, cell_text in enumerate(row_data)
+    ) + "</w:tr>"
+
+
+def _append_xml(doc, xml):
+    """Parse a run of body-level elements once and splice them in, in order."""
+    body = doc.element.body
+    fragment = parse_xml(f"<w:body {nsdecls('w')}>{xml}</w:body>")
+    anchor = body.sectPr
+    for el in list(fragment):
+        if anchor is None:
+            body.append(el)
+        else:
+            anchor.addprevious(el)
+
+
+def _bullets_xml(items):
+    """Render bullet paragraphs as one XML string; independent of any Document."""
+    return "".join(_BULLET_HEAD + _run_text_xml(text) + _P_TAIL for text in items)
 
 
 def _add_styled_table(doc, headers, rows):
     """Add a professionally styled table."""
-    table = doc.add_table(rows=1, cols=len(headers))
+    table = doc.add_table(rows=0, cols=len(headers))
+    table._tbl.tblPr.style = _BANDED_STYLE_ID  # by id; skips the by-name style lookup
     table.alignment = WD_TABLE_ALIGNMENT.CENTER
 
-    # Header row
-    header_cells = table.rows[0].cells
-    for i, header_text in enumerate(headers):
-        cell = header_cells[i]
-        cell.text = ""
-        p = cell.paragraphs[0]
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run(header_text)
-        run.font.name = "Arial"
-        run.font.size = Pt(10)
-        run.font.bold = True
-        run.font.color.rgb = WHITE
-        from docx.oxml.ns import qn
-        shading = cell._element.get_or_add_tcPr()
-        shading_elm = shading.makeelement(qn('w:shd'), {
-            qn('w:fill'): HEADER_BG,
-            qn('w:val'): 'clear'
-        })
-        shading.append(shading_elm)
-
-    # Data rows
-    for row_idx, row_data in enumerate(rows):
-        row_cells = table.add_row().cells
-        bg = LIGHT_BG if row_idx % 2 == 0 else "FFFFFF"
-        for col_idx, cell_text in enumerate(row_data):
-            cell = row_cells[col_idx]
-            cell.text = ""
-            p = cell.paragraphs[0]
-            run = p.add_run(str(cell_text))
-            run.font.name = "Arial"
-            run.font.size = Pt(10)
-            run.font.color.rgb = NAVY
-            from docx.oxml.ns import qn
-            shading = cell._element.get_or_add_tcPr()
-            shading_elm = shading.makeelement(qn('w:shd'), {
-                qn('w:fill'): bg,
-                qn('w:val'): 'clear'
-            })
-            shading.append(shading_elm)
+    # Header and data rows are rendered as one XML fragment and parsed in a
+    # single call. `rows` may be any iterable (e.g. a generator), it is consumed once.
+    widths = [col.get(qn("w:w")) for col in table._tbl.tblGrid.gridCol_lst]
+    header_heads = [_HEADER_CELL_HEAD_TMPL.format(width=w, color=WHITE) for w in widths]
+    heads = [_CELL_HEAD_TMPL.format(width=w, color=NAVY) for w in widths]
+    rows_xml = _render_row_xml(headers, header_heads) + "".join(
+        _render_row_xml(row_data, heads) for row_data in rows
+    )
+    table._tbl.extend(parse_xml(f"<w:tbl {nsdecls('w')}>{rows_xml}</w:tbl>"))
 
     return table
 
 
 def _add_divider(doc):
     """Add a visual divider line."""
-    p = doc.add_paragraph()
-    p.paragraph_format.space_before = Pt(4)
-    p.paragraph_format.space_after = Pt(8)
-    run = p.add_run("_" * 80)
-    run.font.color.rgb = RGBColor(0xCC, 0xCC, 0xCC)
-    run.font.size = Pt(6)
+    _append_xml(doc, _DIVIDER_XML)
+
+
+def _add_bullet_section(doc, heading, items, level=1, divider=True):
+    """Add heading, bullet list and (optionally) a divider with a single XML parse."""
+    _append_xml(doc, _heading_xml(heading, level) + _bullets_xml(items) + (_DIVIDER_XML if divider else ""))
 
 
 def _add_cover_page(doc, title, subtitle=""):
     """Add a professional cover page."""
-    # Spacer
-    for _ in range(4):
-        doc.add_paragraph("")
-
-    # Title
+    # Title — pushed down the page by space_before rather than spacer paragraphs
     t = doc.add_paragraph()
     t.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    t.paragraph_format.space_before = _PT120
     run = t.add_run(title)
     run.font.name = "Arial"
-    run.font.size = Pt(28)
+    run.font.size = _PT28
     run.font.bold = True
     run.font.color.rgb = NAVY
 
@@ -151,7 +244,7 @@ def _add_cover_page(doc, title, subtitle=""):
         s.alignment = WD_ALIGN_PARAGRAPH.CENTER
         run = s.add_run(subtitle)
         run.font.name = "Arial"
-        run.font.size = Pt(14)
+        run.font.size = _PT14
         run.font.color.rgb = BLUE
 
     # Divider
@@ -159,27 +252,72 @@ def _add_cover_page(doc, title, subtitle=""):
     d.alignment = WD_ALIGN_PARAGRAPH.CENTER
     run = d.add_run("━" * 40)
     run.font.color.rgb = BLUE
-    run.font.size = Pt(12)
+    run.font.size = _PT12
 
     # Date
     dt = doc.add_paragraph()
     dt.alignment = WD_ALIGN_PARAGRAPH.CENTER
     run = dt.add_run(datetime.now().strftime("%B %d, %Y"))
     run.font.name = "Arial"
-    run.font.size = Pt(12)
+    run.font.size = _PT12
     run.font.color.rgb = GRAY
 
     # Page break
     doc.add_page_break()
 
 
-def _ensure_save_path():
-    """Ensure the documents directory exists."""
-    os.makedirs(DOCS_SAVE_PATH, exist_ok=True)
+def _describe_object(sf, object_name):
+    """
+    Return describe() for an object, cached per session for DESCRIBE_CACHE_TTL seconds.
+
+    describe() reflects the calling user's field-level security, so the key
+    includes a digest of the session id — never the raw token — and users
+    sharing an org don't see each other's field lists.
+    """
+    session = hashlib.sha256(sf.session_id.encode("utf-8")).hexdigest()[:16]
+    key = f"{sf.sf_instance}:{session}:{object_name}"
+    cache = get_cache()
+    describe = cache.get("object_metadata", key)
+    if describe is None:
+        describe = sf.__getattr__(object_name).describe()
+        cache.set("object_metadata", key, describe, ttl=DESCRIBE_CACHE_TTL)
+    return describe
+
+
+def _item_counts(**sections):
+    """Item count per list section, 0 for sections that were omitted."""
+    return {name: len(items) if items else 0 for name, items in sections.items()}
+
+
+def _dumps(obj):
+    """Serialize a tool response as indented JSON, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+
+def _new_document():
+    """Create a blank document from the cached template bytes."""
+    return Document(io.BytesIO(_TEMPLATE_BYTES))
+
+
+def _save_document(doc, file_path):
+    """Serialize the document in memory, then write it to disk in one pass."""
+    buf = io.BytesIO()
+    doc.save(buf)
+    try:
+        f = open(file_path, "wb")
+    except FileNotFoundError:
+        # Only the documents directory is recreated; subdirectories named in
+        # a caller-supplied file_name must already exist, as before
+        os.makedirs(DOCS_SAVE_PATH, exist_ok=True)
+        f = open(file_path, "wb")
+    with f:
+        f.write(buf.getbuffer())
 
 
 def _make_file_path(prefix, file_name=None):
-    """Generate a file path with auto-naming."""
+    """Generate an absolute file path with auto-naming."""
     if not file_name:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_name = f"{prefix}_{timestamp}.docx"
@@ -219,10 +357,9 @@ def generate_brd_document(
         JSON with file path and document metadata
     """
     try:
-        _ensure_save_path()
         file_path, file_name = _make_file_path("BRD", file_name)
 
-        doc = Document()
+        doc = _new_document()
         _add_cover_page(doc, "Business Requirements Document", summary)
 
         # Summary
@@ -237,10 +374,7 @@ def generate_brd_document(
 
         # Fields to be Created
         if fields:
-            _add_styled_heading(doc, "Fields to be Created", level=1)
-            for field in fields:
-                _add_bullet(doc, field)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Fields to be Created", fields, level=1)
 
         # Automations
         has_automations = triggers or flows or validations
@@ -248,57 +382,50 @@ def generate_brd_document(
             _add_styled_heading(doc, "Automations", level=1)
 
             if triggers:
-                _add_styled_heading(doc, "Triggers", level=2)
-                for trigger in triggers:
-                    _add_bullet(doc, trigger)
+                _add_bullet_section(doc, "Triggers", triggers, level=2, divider=False)
 
             if flows:
-                _add_styled_heading(doc, "Flows", level=2)
-                for flow in flows:
-                    _add_bullet(doc, flow)
+                _add_bullet_section(doc, "Flows", flows, level=2, divider=False)
 
             if validations:
-                _add_styled_heading(doc, "Validation Rules", level=2)
-                for rule in validations:
-                    _add_bullet(doc, rule)
+                _add_bullet_section(doc, "Validation Rules", validations, level=2, divider=False)
 
             _add_divider(doc)
 
         # Acceptance Criteria
         if acceptance_criteria:
-            _add_styled_heading(doc, "Acceptance Criteria", level=1)
-            for criteria in acceptance_criteria:
-                _add_bullet(doc, criteria)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Acceptance Criteria", acceptance_criteria, level=1)
 
         # Business Value
         if business_value:
             _add_styled_heading(doc, "Business Value", level=1)
             _add_body_text(doc, business_value)
 
-        doc.save(file_path)
+        _save_document(doc, file_path)
 
-        return json.dumps({
+        counts = _item_counts(
+            fields=fields, triggers=triggers, flows=flows,
+            validations=validations, acceptance_criteria=acceptance_criteria
+        )
+
+        return _dumps({
             "success": True,
             "message": "BRD document generated successfully",
-            "file_path": os.path.abspath(file_path),
+            "file_path": file_path,
             "file_name": file_name,
             "doc_type": "BRD",
             "sections_included": {
                 "summary": True,
                 "description": True,
-                "fields": bool(fields),
-                "triggers": bool(triggers),
-                "flows": bool(flows),
-                "validations": bool(validations),
-                "acceptance_criteria": bool(acceptance_criteria),
+                **{name: n > 0 for name, n in counts.items()},
                 "business_value": bool(business_value)
-            }
-        }, indent=2)
+            },
+            "item_counts": counts
+        })
 
     except Exception as e:
         logger.exception("generate_brd_document failed")
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 # ── Design Document Tool ───────────────────────────────────────────────────────
@@ -332,10 +459,9 @@ def generate_design_document(
         JSON with file path and document metadata
     """
     try:
-        _ensure_save_path()
         file_path, file_name = _make_file_path("Design_Document", file_name)
 
-        doc = Document()
+        doc = _new_document()
         _add_cover_page(doc, "Design Document", title)
 
         # Requirement
@@ -349,10 +475,7 @@ def generate_design_document(
         _add_divider(doc)
 
         # Changes Required
-        _add_styled_heading(doc, "Changes", level=1)
-        for change in changes:
-            _add_bullet(doc, change)
-        _add_divider(doc)
+        _add_bullet_section(doc, "Changes", changes, level=1)
 
         # Components
         if components:
@@ -366,46 +489,41 @@ def generate_design_document(
 
         # Objects Affected
         if objects_affected:
-            _add_styled_heading(doc, "Objects Affected", level=1)
-            for obj in objects_affected:
-                _add_bullet(doc, obj)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Objects Affected", objects_affected, level=1)
 
         # Dependencies
         if dependencies:
-            _add_styled_heading(doc, "Dependencies", level=1)
-            for dep in dependencies:
-                _add_bullet(doc, dep)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Dependencies", dependencies, level=1)
 
         # Risks
         if risks:
-            _add_styled_heading(doc, "Risks & Considerations", level=1)
-            for risk in risks:
-                _add_bullet(doc, risk)
+            _add_bullet_section(doc, "Risks & Considerations", risks, level=1, divider=False)
 
-        doc.save(file_path)
+        _save_document(doc, file_path)
 
-        return json.dumps({
+        counts = _item_counts(
+            changes=changes, components=components, objects_affected=objects_affected,
+            dependencies=dependencies, risks=risks
+        )
+
+        return _dumps({
             "success": True,
             "message": f"Design document generated: {title}",
-            "file_path": os.path.abspath(file_path),
+            "file_path": file_path,
             "file_name": file_name,
             "doc_type": "Design",
             "sections_included": {
                 "requirement": True,
                 "solution": True,
-                "changes": True,
-                "components": bool(components),
-                "objects_affected": bool(objects_affected),
-                "dependencies": bool(dependencies),
-                "risks": bool(risks)
-            }
-        }, indent=2)
+                **{name: n > 0 for name, n in counts.items()},
+                "changes": True
+            },
+            "item_counts": counts
+        })
 
     except Exception as e:
         logger.exception("generate_design_document failed")
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 # ── Test Document Tool ─────────────────────────────────────────────────────────
@@ -437,10 +555,9 @@ def generate_test_document(
         JSON with file path and document metadata
     """
     try:
-        _ensure_save_path()
         file_path, file_name = _make_file_path("Test_Document", file_name)
 
-        doc = Document()
+        doc = _new_document()
         _add_cover_page(doc, "Test Document", title)
 
         # Description
@@ -450,17 +567,11 @@ def generate_test_document(
 
         # Preconditions
         if preconditions:
-            _add_styled_heading(doc, "Preconditions", level=1)
-            for pre in preconditions:
-                _add_bullet(doc, pre)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Preconditions", preconditions, level=1)
 
         # Test Data
         if test_data:
-            _add_styled_heading(doc, "Test Data Requirements", level=1)
-            for td in test_data:
-                _add_bullet(doc, td)
-            _add_divider(doc)
+            _add_bullet_section(doc, "Test Data Requirements", test_data, level=1)
 
         # Test Cases (as numbered table)
         _add_styled_heading(doc, "Test Cases", level=1)
@@ -487,30 +598,32 @@ def generate_test_document(
                 bulk_rows.append([str(idx), bt, "Pass / Fail"])
             _add_styled_table(doc, ["#", "Test Case", "Result"], bulk_rows)
 
-        doc.save(file_path)
+        _save_document(doc, file_path)
 
-        total_tests = len(test_cases) + len(negative_tests or []) + len(bulk_tests or [])
+        counts = _item_counts(
+            preconditions=preconditions, test_data=test_data, test_cases=test_cases,
+            negative_tests=negative_tests, bulk_tests=bulk_tests
+        )
+        total_tests = counts["test_cases"] + counts["negative_tests"] + counts["bulk_tests"]
 
-        return json.dumps({
+        return _dumps({
             "success": True,
             "message": f"Test document generated: {title}",
-            "file_path": os.path.abspath(file_path),
+            "file_path": file_path,
             "file_name": file_name,
             "doc_type": "Test",
             "total_test_cases": total_tests,
             "sections_included": {
                 "description": True,
-                "preconditions": bool(preconditions),
-                "test_data": bool(test_data),
-                "test_cases": True,
-                "negative_tests": bool(negative_tests),
-                "bulk_tests": bool(bulk_tests)
-            }
-        }, indent=2)
+                **{name: n > 0 for name, n in counts.items()},
+                "test_cases": True
+            },
+            "item_counts": counts
+        })
 
     except Exception as e:
         logger.exception("generate_test_document failed")
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 # ── SF Object Schema Doc Tool ─────────────────────────────────────────────────
@@ -535,12 +648,13 @@ def generate_sf_object_documentation(
     """
     try:
         sf = get_salesforce_connection()
-        describe = sf.__getattr__(object_name).describe()
+        describe = _describe_object(sf, object_name)
+        fields = describe.get("fields", [])
+        child_rels = describe.get("childRelationships", [])
 
-        _ensure_save_path()
         file_path, file_name = _make_file_path(f"{object_name}_Schema")
 
-        doc = Document()
+        doc = _new_document()
         _add_cover_page(doc, "Schema Documentation", f"{describe['label']} ({object_name})")
 
         # Overview
@@ -549,31 +663,31 @@ def generate_sf_object_documentation(
             ["API Name", object_name],
             ["Label", describe["label"]],
             ["Plural Label", describe.get("labelPlural", "N/A")],
-            ["Custom Object", "Yes" if describe.get("custom") else "No"],
-            ["Queryable", "Yes" if describe.get("queryable") else "No"],
+            ["Custom Object", _YES_NO[bool(describe.get("custom"))]],
+            ["Queryable", _YES_NO[bool(describe.get("queryable"))]],
         ]
         _add_styled_table(doc, ["Property", "Value"], overview_rows)
         _add_divider(doc)
 
         # Fields
         if include_fields:
-            fields = describe.get("fields", [])
             _add_styled_heading(doc, f"Fields ({len(fields)})", level=1)
-            field_rows = []
-            for f in fields:
-                field_rows.append([
+            # Streamed straight into the row renderer; no intermediate row lists
+            field_rows = (
+                (
                     f["name"],
                     f["label"],
                     f["type"],
-                    "Yes" if not f.get("nillable", True) else "No",
-                    "Yes" if f.get("custom", False) else "No"
-                ])
+                    _YES_NO[not f.get("nillable", True)],
+                    _YES_NO[bool(f.get("custom", False))]
+                )
+                for f in fields
+            )
             _add_styled_table(doc, ["API Name", "Label", "Type", "Required", "Custom"], field_rows)
             _add_divider(doc)
 
         # Relationships
         if include_relationships:
-            child_rels = describe.get("childRelationships", [])
             _add_styled_heading(doc, f"Relationships ({len(child_rels)})", level=1)
             if child_rels:
                 rel_rows = []
@@ -597,23 +711,23 @@ def generate_sf_object_documentation(
                 for rt in record_types:
                     rt_rows.append([
                         rt.get("name", "N/A"),
-                        "Yes" if rt.get("active") else "No",
-                        "Yes" if rt.get("defaultRecordTypeMapping") else "No"
+                        _YES_NO[bool(rt.get("active"))],
+                        _YES_NO[bool(rt.get("defaultRecordTypeMapping"))]
                     ])
                 _add_styled_table(doc, ["Name", "Active", "Default"], rt_rows)
 
-        doc.save(file_path)
+        _save_document(doc, file_path)
 
-        return json.dumps({
+        return _dumps({
             "success": True,
             "message": f"Schema documentation generated for {object_name}",
-            "file_path": os.path.abspath(file_path),
+            "file_path": file_path,
             "file_name": file_name,
             "object_name": object_name,
-            "field_count": len(describe.get("fields", [])),
-            "relationship_count": len(describe.get("childRelationships", []))
-        }, indent=2)
+            "field_count": len(fields),
+            "relationship_count": len(child_rels)
+        })
 
     except Exception as e:
         logger.exception("generate_sf_object_documentation failed")
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
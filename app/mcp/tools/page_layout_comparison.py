@@ -8,15 +8,25 @@ Created by Sameer
 """
 import base64
 import csv
+import hashlib
 import io
 import json
 import logging
 import os
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
 import time
 import zipfile
-from typing import Any, Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, AbstractSet, Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape as xml_escape
 
 import requests
+from requests.adapters import HTTPAdapter
 from lxml import etree
 
 from app.mcp.server import register_tool
@@ -27,6 +37,64 @@ from app.mcp.tools.utils import format_error_response, format_success_response
 logger = logging.getLogger(__name__)
 
 METADATA_NS = "http://soap.sforce.com/2006/04/metadata"
+_TAG_LAYOUT_SECTIONS = f"{{{METADATA_NS}}}layoutSections"
+_TAG_RELATED_LISTS = f"{{{METADATA_NS}}}relatedLists"
+
+# XPath expressions compiled once; calling them skips per-call path parsing
+# and namespace-map resolution.
+_XP_NS = {"m": METADATA_NS}
+_XP_LABEL = etree.XPath("m:label", namespaces=_XP_NS)
+_XP_SECTION_FIELDS = etree.XPath(
+    "m:layoutColumns/m:layoutItems/m:field/text()", namespaces=_XP_NS, smart_strings=False
+)
+_XP_RL_NAME = etree.XPath("m:relatedList/text()", namespaces=_XP_NS, smart_strings=False)
+_XP_ID = etree.XPath(".//m:id", namespaces=_XP_NS)
+_STATUS_TAGS = tuple(
+    f"{{{METADATA_NS}}}{name}" for name in ("done", "status", "errorMessage", "zipFile")
+)
+
+# Parser settings for Salesforce-generated XML: no entity expansion, network
+# fetches or xml:id bookkeeping, and indentation-only text nodes dropped (none
+# carry meaning in layout or SOAP XML). _SOAP_PARSER parses the retrieve
+# response; the iterparse call sites take the same options as keyword arguments.
+_PARSE_OPTIONS: Dict[str, Any] = {
+    "remove_blank_text": True,
+    "resolve_entities": False,
+    "no_network": True,
+    "collect_ids": False,
+}
+_SOAP_PARSER = etree.XMLParser(huge_tree=False, **_PARSE_OPTIONS)
+
+# Shared keep-alive session for all Metadata API calls, so the retrieve and every
+# checkRetrieveStatus poll reuse one TLS connection per org instead of
+# handshaking each time. pool_connections keeps source and target hosts pooled
+# side by side.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Asked for explicitly: the checkRetrieveStatus body is mostly base64 ZIP text,
+# which gzip shrinks 2–3x on the wire. requests inflates resp.content itself;
+# streamed reads off resp.raw need decode_content (see _check_retrieve_status).
+_SOAP_HEADERS = {
+    "Content-Type": "text/xml; charset=UTF-8",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# checkRetrieveStatus polling: start short so small retrieves return quickly,
+# double up to the cap so large ones don't hammer the API
+_POLL_INITIAL_DELAY = 0.5
+_POLL_MAX_DELAY = 3.0
+_POLL_TIMEOUT = 120
+
+# Upper bound on concurrent per-org retrieves in _fetch_layouts_multi
+_MAX_FETCH_WORKERS = 8
+
+# Retrieved ZIPs stay in RAM up to this size, then spill to disk, so memory
+# tracks small retrieves and stays flat for large ones. Base64 is decoded in
+# slices that are a multiple of 4 chars so no quad straddles a cut.
+_ZIP_SPOOL_MAX = 8 << 20
+_B64_CHUNK = 1 << 20
+_WS_RE = re.compile(r"\s")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ORG CREDENTIAL HELPERS
@@ -70,14 +138,14 @@ def _get_org_credentials(user_id: Optional[str]) -> Tuple[str, str, str]:
 def _build_retrieve_envelope(token: str, api_version: str,
                               layout_names: List[str]) -> bytes:
     members_xml = "\n                        ".join(
-        f"<met:members>{n}</met:members>" for n in layout_names
+        f"<met:members>{xml_escape(n)}</met:members>" for n in layout_names
     )
     soap = f"""<?xml version="1.0" encoding="UTF-8"?>
 <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
                   xmlns:met="{METADATA_NS}">
     <soapenv:Header>
         <met:CallOptions><met:client>SF-MCP-PageLayout</met:client></met:CallOptions>
-        <met:SessionHeader><met:sessionId>{token}</met:sessionId></met:SessionHeader>
+        <met:SessionHeader><met:sessionId>{xml_escape(token)}</met:sessionId></met:SessionHeader>
     </soapenv:Header>
     <soapenv:Body>
         <met:retrieve>
@@ -97,29 +165,38 @@ def _build_retrieve_envelope(token: str, api_version: str,
     return soap.encode("utf-8")
 
 
-def _build_status_envelope(token: str, api_version: str,
-                            retrieve_id: str) -> bytes:
-    soap = f"""<?xml version="1.0" encoding="UTF-8"?>
+# checkRetrieveStatus is posted on every poll, so its constant scaffold is
+# encoded once; only the session id and retrieve id are spliced in per call.
+_STATUS_PREFIX = f"""<?xml version="1.0" encoding="UTF-8"?>
 <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
                   xmlns:met="{METADATA_NS}">
     <soapenv:Header>
-        <met:SessionHeader><met:sessionId>{token}</met:sessionId></met:SessionHeader>
+        <met:SessionHeader><met:sessionId>""".encode("utf-8")
+_STATUS_MID = b"""</met:sessionId></met:SessionHeader>
     </soapenv:Header>
     <soapenv:Body>
         <met:checkRetrieveStatus>
-            <met:asyncProcessId>{retrieve_id}</met:asyncProcessId>
+            <met:asyncProcessId>"""
+_STATUS_SUFFIX = b"""</met:asyncProcessId>
             <met:includeZip>true</met:includeZip>
         </met:checkRetrieveStatus>
     </soapenv:Body>
 </soapenv:Envelope>"""
-    return soap.encode("utf-8")
+
+
+def _build_status_envelope(token: str, retrieve_id: str) -> bytes:
+    return b"".join((
+        _STATUS_PREFIX, xml_escape(token).encode("utf-8"),
+        _STATUS_MID, xml_escape(retrieve_id).encode("utf-8"),
+        _STATUS_SUFFIX,
+    ))
 
 
 def _soap_post(url: str, body: bytes, action: str) -> etree._Element:
     """POST a SOAP envelope and return the parsed response root element."""
-    resp = requests.post(
+    resp = _SESSION.post(
         url, data=body,
-        headers={"Content-Type": "text/xml; charset=UTF-8", "SOAPAction": action},
+        headers={**_SOAP_HEADERS, "SOAPAction": action},
         timeout=60
     )
     if resp.status_code != 200:
@@ -127,91 +204,188 @@ def _soap_post(url: str, body: bytes, action: str) -> etree._Element:
             f"Metadata API call '{action}' failed "
             f"(HTTP {resp.status_code}): {resp.text[:600]}"
         )
-    return etree.fromstring(resp.content)
+    return etree.fromstring(resp.content, parser=_SOAP_PARSER)
+
 
+def _check_retrieve_status(url: str, body: bytes) -> Tuple[Dict[str, str], Optional[IO[bytes]]]:
+    """
+    POST checkRetrieveStatus and stream the response through iterparse.
 
-def _find_el(root: etree._Element, local_name: str) -> Optional[etree._Element]:
-    return root.find(f".//{{{METADATA_NS}}}{local_name}")
+    Returns ({done, status, errorMessage}: text, zip_file).  The base64 zipFile
+    payload is decoded straight into a spooled temp file (rewound, ready for
+    zipfile) instead of holding the SOAP body, the base64 text and the decoded
+    ZIP in memory at once; zip_file is None when the response carries no ZIP.
+    """
+    resp = _SESSION.post(
+        url, data=body,
+        headers={**_SOAP_HEADERS, "SOAPAction": "checkRetrieveStatus"},
+        timeout=60, stream=True
+    )
+    with resp:
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"Metadata API call 'checkRetrieveStatus' failed "
+                f"(HTTP {resp.status_code}): {resp.text[:600]}"
+            )
+        # resp.raw bypasses requests' transparent gunzip unless asked for it
+        resp.raw.decode_content = True
+
+        fields: Dict[str, str] = {}
+        zip_file: Optional[IO[bytes]] = None
+        # huge_tree: the base64 zipFile is one text node and easily passes
+        # libxml2's 10 MB default cap on retrieves of many layouts
+        for _, elem in etree.iterparse(
+            resp.raw, events=("end",), tag=_STATUS_TAGS, huge_tree=True, **_PARSE_OPTIONS
+        ):
+            name = etree.QName(elem).localname
+            if name == "zipFile":
+                if elem.text and zip_file is None:
+                    zip_file = _b64_to_spooled(elem.text)
+            else:
+                # First hit wins — the result-level field precedes any nested ones
+                fields.setdefault(name, elem.text or "")
+            elem.clear()
+    return fields, zip_file
+
+
+def _b64_to_spooled(b64_text: str) -> IO[bytes]:
+    """Decode base64 text into a SpooledTemporaryFile in 4-char-aligned chunks."""
+    if _WS_RE.search(b64_text):
+        b64_text = "".join(b64_text.split())
+    out = tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_MAX)
+    for i in range(0, len(b64_text), _B64_CHUNK):
+        out.write(base64.b64decode(b64_text[i:i + _B64_CHUNK]))
+    out.seek(0)
+    return out
 
 
 def _fetch_all_layouts(instance_url: str, token: str, api_version: str,
-                       layout_names: List[str]) -> Dict[str, str]:
+                       layout_names: List[str]) -> Dict[str, bytes]:
     """
     Retrieve all requested layout XMLs from one org in a single Metadata API call.
-    Returns {layout_base_name: xml_string}.  Layouts not found in the org are absent.
+    Returns {layout_base_name: xml_bytes}.  Layouts not found in the org are absent.
     """
     meta_url = f"{instance_url}/services/Soap/m/{api_version}"
 
     # 1. Start retrieve
     body = _build_retrieve_envelope(token, api_version, layout_names)
     root = _soap_post(meta_url, body, "retrieve")
-    id_el = _find_el(root, "id")
-    if id_el is None:
+    id_hits = _XP_ID(root)
+    if not id_hits:
         raise RuntimeError(
             f"No retrieve ID returned from {instance_url}. "
             "Check org credentials and API version."
         )
-    retrieve_id = id_el.text
+    retrieve_id = id_hits[0].text
 
-    # 2. Poll until done (max 120 s)
-    deadline = time.time() + 120
+    # 2. Poll until done (max 120 s), backing off 0.5s → 1s → 2s → 3s cap
+    deadline = time.time() + _POLL_TIMEOUT
+    delay = _POLL_INITIAL_DELAY
     while time.time() < deadline:
-        status_body = _build_status_envelope(token, api_version, retrieve_id)
-        status_root = _soap_post(meta_url, status_body, "checkRetrieveStatus")
-
-        done_el = _find_el(status_root, "done")
-        if done_el is None or done_el.text != "true":
-            time.sleep(3)
+        status_body = _build_status_envelope(token, retrieve_id)
+        fields, zip_file = _check_retrieve_status(meta_url, status_body)
+
+        if fields.get("done") != "true":
+            if zip_file is not None:
+                zip_file.close()
+            time.sleep(delay + random.uniform(0, 0.1))
+            delay = min(delay * 2, _POLL_MAX_DELAY)
             continue
 
         # Check for hard failure
-        status_el = _find_el(status_root, "status")
-        if status_el is not None and status_el.text == "Failed":
-            err_el = _find_el(status_root, "errorMessage")
+        if fields.get("status") == "Failed":
+            if zip_file is not None:
+                zip_file.close()
             raise RuntimeError(
                 f"Retrieve failed on {instance_url}: "
-                f"{err_el.text if err_el is not None else 'unknown error'}"
+                f"{fields.get('errorMessage') or 'unknown error'}"
             )
 
         # 3. Extract ZIP
-        zip_el = _find_el(status_root, "zipFile")
-        if zip_el is None or not zip_el.text:
+        if zip_file is None:
             logger.warning("Retrieve completed but ZIP is empty — no layouts found.")
             return {}
 
-        zip_bytes = base64.b64decode(zip_el.text)
-        return _extract_layouts_from_zip(zip_bytes)
+        with zip_file:
+            return _extract_layouts_from_spooled(zip_file)
 
     raise TimeoutError(
-        f"Metadata API retrieve from {instance_url} did not complete within 120 s."
+        f"Metadata API retrieve from {instance_url} did not complete within {_POLL_TIMEOUT} s."
+    )
+
+
+class _OrgFetchError(Exception):
+    """Wraps a retrieve failure with the key of the org it came from."""
+
+    def __init__(self, org_key: str, error: Exception):
+        super().__init__(f"{org_key}: {error}")
+        self.org_key = org_key
+        self.error = error
+
+
+def _fetch_layouts_multi(orgs: Dict[str, Tuple[str, str]], api_version: str,
+                         layout_names: List[str]) -> Dict[str, Dict[str, bytes]]:
+    """
+    Retrieve the same layouts from several orgs concurrently.
+
+    orgs maps a caller-chosen key to (instance_url, token); keys that share
+    the same pair are retrieved once and get the same result dict. Each
+    retrieve is network/poll bound, so wall time tracks the slowest org rather
+    than the sum. Returns {org_key: {layout_base_name: xml_bytes}}.
+
+    Results are collected in orgs order; the first failure raises
+    _OrgFetchError without waiting for the remaining orgs to finish polling.
+    """
+    unique = list(dict.fromkeys(orgs.values()))
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(unique), _MAX_FETCH_WORKERS),
+        thread_name_prefix="layout-fetch",
     )
+    try:
+        futures = {
+            creds: executor.submit(_fetch_all_layouts, creds[0], creds[1], api_version, layout_names)
+            for creds in unique
+        }
+        result: Dict[str, Dict[str, bytes]] = {}
+        for key, creds in orgs.items():
+            try:
+                result[key] = futures[creds].result()
+            except Exception as e:
+                raise _OrgFetchError(key, e) from e
+        return result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
-def _extract_layouts_from_zip(zip_bytes: bytes) -> Dict[str, str]:
+def _extract_layouts_from_spooled(spooled_file: IO[bytes]) -> Dict[str, bytes]:
     """
-    Unpack the retrieve ZIP and return {layout_base_name: xml_string}.
+    Unpack the retrieve ZIP from the (rewound) spooled temp file produced by
+    _check_retrieve_status and return {layout_base_name: xml_bytes}.
+    The raw bytes go straight to lxml — no decode/encode round-trip.
 
     Salesforce stores layouts at:
         unpackaged/layouts/Object-Layout Name.layout-meta.xml
     The key returned is the base name with suffixes stripped, e.g.:
         "Account-Account Layout"
     """
-    result: Dict[str, str] = {}
-    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
-        for entry in zf.namelist():
-            lower = entry.lower()
-            if "/layouts/" not in lower:
-                continue
-            if not (lower.endswith(".layout-meta.xml") or lower.endswith(".layout")):
+    result: Dict[str, bytes] = {}
+    with zipfile.ZipFile(spooled_file) as zf:
+        # Salesforce writes these paths in exact case, so no lower() copies;
+        # reading by ZipInfo skips the name → info lookup.
+        for info in zf.infolist():
+            fn = info.filename
+            if "/layouts/" not in fn:
                 continue
 
-            base = entry.split("/")[-1]
-            for suffix in (".layout-meta.xml", ".layout"):
-                if base.lower().endswith(suffix):
-                    base = base[: -len(suffix)]
-                    break
+            base = fn.rsplit("/", 1)[-1]
+            if base.endswith(".layout-meta.xml"):
+                base = base[:-len(".layout-meta.xml")]
+            elif base.endswith(".layout"):
+                base = base[:-len(".layout")]
+            else:
+                continue
 
-            result[base] = zf.read(entry).decode("utf-8")
+            result[base] = zf.read(info)
 
     return result
 
@@ -220,76 +394,107 @@ def _extract_layouts_from_zip(zip_bytes: bytes) -> Dict[str, str]:
 # LAYOUT XML PARSER
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _parse_layout(xml_content: str) -> Dict[str, Any]:
+def _parse_layout(xml_content: bytes) -> Dict[str, Any]:
     """
     Parse a Salesforce Layout XML and return a structured dict:
         {
-            "sections":       {section_label: [field_api_name, ...]},
-            "all_fields":     set of every field API name in the layout,
-            "related_lists":  set of relatedList API names,
+            "sections":       {section_label: field_count},
+            "all_fields":     frozenset of every field API name in the layout,
+            "related_lists":  frozenset of relatedList API names,
         }
 
     Handles blank spacer items (layoutItems with no <field> child) gracefully.
     """
-    ns = {"m": METADATA_NS}
-    try:
-        root = etree.fromstring(xml_content.encode("utf-8"))
-    except etree.XMLSyntaxError as exc:
-        raise ValueError(f"Could not parse layout XML: {exc}") from exc
-
-    sections: Dict[str, List[str]] = {}
+    sections: Dict[str, int] = {}
     all_fields: Set[str] = set()
     related_lists: Set[str] = set()
 
-    # ── layoutSections ──────────────────────────────────────────────────────
-    for section in root.findall("m:layoutSections", ns):
-        lbl_el = section.find("m:label", ns)
-        label = (lbl_el.text or "").strip() if lbl_el is not None else "Unnamed Section"
-
-        section_fields: List[str] = []
-        for col in section.findall("m:layoutColumns", ns):
-            for item in col.findall("m:layoutItems", ns):
-                f_el = item.find("m:field", ns)
-                if f_el is not None and f_el.text and f_el.text.strip():
-                    fname = f_el.text.strip()
-                    section_fields.append(fname)
-                    all_fields.add(fname)
-
-        sections[label] = section_fields
-
-    # ── relatedLists ─────────────────────────────────────────────────────────
-    for rl in root.findall("m:relatedLists", ns):
-        rl_el = rl.find("m:relatedList", ns)
-        if rl_el is not None and rl_el.text and rl_el.text.strip():
-            related_lists.add(rl_el.text.strip())
+    # Single streaming pass over the two top-level tags we need. Each one is
+    # fully built at its "end" event; once handled it is cleared and earlier
+    # siblings are dropped, so the resident tree stays small.
+    try:
+        for _, elem in etree.iterparse(
+            io.BytesIO(xml_content), events=("end",),
+            tag=(_TAG_LAYOUT_SECTIONS, _TAG_RELATED_LISTS),
+            huge_tree=False, **_PARSE_OPTIONS,
+        ):
+            parent = elem.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue  # nested (e.g. miniLayout/relatedLists) — not a layout-level entry
+
+            if elem.tag == _TAG_LAYOUT_SECTIONS:
+                # ── layoutSections ──────────────────────────────────────────
+                lbl_els = _XP_LABEL(elem)
+                label = (lbl_els[0].text or "").strip() if lbl_els else "Unnamed Section"
+
+                # Only the label and the layout-wide field set are compared, so
+                # per-section field lists aren't kept — just how many there were.
+                field_count = 0
+                for text in _XP_SECTION_FIELDS(elem):
+                    fname = text.strip()
+                    if fname:
+                        field_count += 1
+                        # Standard fields recur across most layouts; interning
+                        # keeps one str per distinct name across the batch
+                        all_fields.add(sys.intern(fname))
+
+                sections[label] = field_count
+            else:
+                # ── relatedLists ────────────────────────────────────────────
+                rl_names = _XP_RL_NAME(elem)
+                rl_name = rl_names[0].strip() if rl_names else ""
+                if rl_name:
+                    related_lists.add(sys.intern(rl_name))
+
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
+    except etree.XMLSyntaxError as exc:
+        raise ValueError(f"Could not parse layout XML: {exc}") from exc
 
     return {
         "sections": sections,
-        "all_fields": all_fields,
-        "related_lists": related_lists,
+        "all_fields": frozenset(all_fields),
+        "related_lists": frozenset(related_lists),
     }
 
 
+def _parse_layout_cached(xml_content: bytes, cache: Dict[bytes, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    _parse_layout memoized on a 128-bit blake2b digest of the XML bytes.
+    Parsed dicts are never mutated after construction, so sharing one between
+    source and target (or across layouts) is safe.
+    """
+    key = hashlib.blake2b(xml_content, digest_size=16).digest()
+    parsed = cache.get(key)
+    if parsed is None:
+        parsed = cache[key] = _parse_layout(xml_content)
+    return parsed
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # COMPARISON ENGINE
 # ─────────────────────────────────────────────────────────────────────────────
 
 def _compare(source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
-    """Diff two parsed layout dicts. All sets are treated as unordered."""
-    src_fields: Set[str] = source["all_fields"]
-    tgt_fields: Set[str] = target["all_fields"]
-    src_sections: Set[str] = set(source["sections"].keys())
-    tgt_sections: Set[str] = set(target["sections"].keys())
-    src_rl: Set[str] = source["related_lists"]
-    tgt_rl: Set[str] = target["related_lists"]
+    """
+    Diff two parsed layout dicts. All sets are treated as unordered; the diffs
+    come back as unsorted sets and are only ordered when rendered by _cell.
+    """
+    src_fields: FrozenSet[str] = source["all_fields"]
+    tgt_fields: FrozenSet[str] = target["all_fields"]
+    src_sections: AbstractSet[str] = source["sections"].keys()
+    tgt_sections: AbstractSet[str] = target["sections"].keys()
+    src_rl: FrozenSet[str] = source["related_lists"]
+    tgt_rl: FrozenSet[str] = target["related_lists"]
 
     return {
-        "fields_missing_in_target":        sorted(src_fields - tgt_fields),
-        "fields_extra_in_target":          sorted(tgt_fields - src_fields),
-        "sections_missing_in_target":      sorted(src_sections - tgt_sections),
-        "sections_extra_in_target":        sorted(tgt_sections - src_sections),
-        "related_lists_missing_in_target": sorted(src_rl - tgt_rl),
-        "related_lists_extra_in_target":   sorted(tgt_rl - src_rl),
+        "fields_missing_in_target":        src_fields - tgt_fields,
+        "fields_extra_in_target":          tgt_fields - src_fields,
+        "sections_missing_in_target":      src_sections - tgt_sections,
+        "sections_extra_in_target":        tgt_sections - src_sections,
+        "related_lists_missing_in_target": src_rl - tgt_rl,
+        "related_lists_extra_in_target":   tgt_rl - src_rl,
         "source_field_count":              len(src_fields),
         "target_field_count":              len(tgt_fields),
         "source_section_count":            len(src_sections),
@@ -328,24 +533,98 @@ CSV_COLUMNS = [
 ]
 
 
-def _cell(lst: List[str]) -> str:
-    """Semicolon-separated cell value for multi-value fields."""
-    return "; ".join(lst) if lst else ""
+def _cell(items: AbstractSet[str]) -> str:
+    """Sorted, semicolon-separated cell value for multi-value fields."""
+    return "; ".join(sorted(items)) if items else ""
 
 
-def _write_csv(rows: List[Dict[str, Any]], filepath: str) -> None:
-    with open(filepath, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-        writer.writeheader()
+def _write_csv(rows: List[Tuple[Any, ...]], filepath: str) -> None:
+    """Write rows as positional tuples in CSV_COLUMNS order through a 1 MiB buffer."""
+    with open(filepath, "w", newline="", encoding="utf-8-sig", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
         writer.writerows(rows)
 
 
-def _blank_row(source_name: str, target_name: str, status: str) -> Dict[str, Any]:
-    row = {col: "" for col in CSV_COLUMNS}
-    row["Source Layout Name"] = source_name
-    row["Target Layout Name"] = target_name
-    row["Status"] = status
-    return row
+# Rows that never reached comparison leave every column after Status blank
+_BLANK_TAIL = ("",) * (len(CSV_COLUMNS) - 3)
+
+
+def _blank_row(source_name: str, target_name: str, status: str) -> Tuple[Any, ...]:
+    return (source_name, target_name, status) + _BLANK_TAIL
+
+
+_ZERO_DIFF_SUMMARY: Dict[str, Any] = {
+    "status": "compared",
+    "fields_missing": 0, "fields_extra": 0,
+    "sections_missing": 0, "sections_extra": 0,
+    "related_lists_missing": 0, "related_lists_extra": 0,
+}
+
+
+def _fast_counts(xml_content: bytes) -> Tuple[int, int, int]:
+    """
+    (fields, sections, related_lists) raw tag counts from a bytes scan of the
+    opening <field>, <layoutSections> and <relatedList> tags — no XML parse.
+
+    These are not the parsed totals: nested occurrences (<relatedList> under
+    <miniLayout>, <field> under <summaryLayoutItems>) are included, and
+    repeated fields or section labels are not de-duplicated.
+    """
+    return (
+        xml_content.count(b"<field>"),
+        xml_content.count(b"<layoutSections>"),
+        xml_content.count(b"<relatedList>"),
+    )
+
+
+def _zero_diff_row(name: str, data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    "Compared" row for a layout whose source and target parse to the same
+    dict (self-compare, or byte-identical XML). Every diff is empty by
+    definition, so _compare is skipped; the totals come from the parse.
+    """
+    fields = len(data["all_fields"])
+    sections = len(data["sections"])
+    related = len(data["related_lists"])
+    return (name, name, "Compared", "", "", 0, 0, "", "", 0, 0, "", "", 0, 0,
+            fields, fields, sections, sections, related, related)
+
+
+class _CsvWriterPool:
+    """
+    Single background thread that drains queued CSV writes, so a caller that
+    only needs the file path isn't held up by disk I/O.
+
+    Writes run in submission order. Failures are logged, since the request
+    that queued them has already returned.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[List[Tuple[Any, ...]], str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, rows: List[Tuple[Any, ...]], filepath: str) -> None:
+        """Queue rows for writing to filepath and return immediately."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="layout-csv-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((rows, filepath))
+
+    def _run(self) -> None:
+        while True:
+            rows, filepath = self._queue.get()
+            try:
+                _write_csv(rows, filepath)
+            except Exception:
+                logger.exception("Background CSV write to %s failed", filepath)
+
+
+_csv_pool = _CsvWriterPool()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -358,6 +637,8 @@ def compare_page_layouts(
     source_org_user_id: str = None,
     target_org_user_id: str = None,
     output_filename: str = None,
+    async_csv: bool = False,
+    counts_only: bool = False,
 ) -> str:
     """
     Compare Salesforce page layouts between two orgs and produce a CSV diff report.
@@ -386,11 +667,25 @@ def compare_page_layouts(
             Optional CSV filename saved to ~/Documents/.
             Defaults to page_layout_comparison_<timestamp>.csv.
 
+        async_csv:
+            If True, hand the CSV to a background writer and return as soon as
+            it is queued — the response reports csv_status "writing" and the
+            file appears shortly after. Default False writes it before returning.
+
+        counts_only:
+            If True, skip the XML parse and diff and report only the field /
+            section / related-list totals per layout, counted straight from the
+            raw XML. Diff columns are left blank and Status is "Counts Only".
+            These totals are raw tag counts — they include nested miniLayout /
+            summaryLayout entries and don't de-duplicate, so they are not
+            comparable with the totals from a default (parsed) run.
+
     CSV columns produced:
         Source Layout Name        — layout name fetched from the source org
         Target Layout Name        — layout name fetched from the target org
-        Status                    — Compared | Source Not Found | Target Not Found |
-                                    Not Found in Either Org | Parse Error
+        Status                    — Compared | Counts Only | Source Not Found |
+                                    Target Not Found | Not Found in Either Org |
+                                    Parse Error
         Fields Missing in Target  — semicolon-separated field API names
         Fields Extra in Target    — semicolon-separated field API names
         Fields Missing Count      — integer
@@ -457,23 +752,23 @@ def compare_page_layouts(
 
         same_org = (src_url == tgt_url and src_token == tgt_token)
 
-        # ── 3. Fetch layouts — one batched retrieve per org ──────────────────
+        # ── 3. Fetch layouts — one batched retrieve per org, both orgs at once ─
+        # same_org collapses to a single retrieve inside _fetch_layouts_multi
         try:
-            src_layouts = _fetch_all_layouts(src_url, src_token, api_ver, names)
-        except Exception as e:
-            return format_error_response(e, context="compare_page_layouts (fetch source layouts)")
-
-        if same_org:
-            tgt_layouts = src_layouts  # no duplicate API call
-        else:
-            try:
-                tgt_layouts = _fetch_all_layouts(tgt_url, tgt_token, api_ver, names)
-            except Exception as e:
-                return format_error_response(e, context="compare_page_layouts (fetch target layouts)")
+            fetched = _fetch_layouts_multi(
+                {"source": (src_url, src_token), "target": (tgt_url, tgt_token)},
+                api_ver, names,
+            )
+        except _OrgFetchError as e:
+            return format_error_response(
+                e.error, context=f"compare_page_layouts (fetch {e.org_key} layouts)"
+            )
+        src_layouts, tgt_layouts = fetched["source"], fetched["target"]
 
         # ── 4. Compare each layout ───────────────────────────────────────────
-        csv_rows: List[Dict[str, Any]] = []
+        csv_rows: List[Tuple[Any, ...]] = []
         summary: List[Dict[str, Any]] = []
+        parse_cache: Dict[bytes, Dict[str, Any]] = {}
 
         for name in names:
             src_xml = src_layouts.get(name)
@@ -495,47 +790,66 @@ def compare_page_layouts(
                 summary.append({"layout": name, "status": "target_not_found"})
                 continue
 
-            # Parse both XMLs
+            if counts_only:
+                src_f, src_s, src_r = _fast_counts(src_xml)
+                tgt_f, tgt_s, tgt_r = _fast_counts(tgt_xml)
+                csv_rows.append((name, name, "Counts Only") + _BLANK_TAIL[:12]
+                                + (src_f, tgt_f, src_s, tgt_s, src_r, tgt_r))
+                summary.append({
+                    "layout":                       name,
+                    "status":                       "counted",
+                    "source_field_count":           src_f,
+                    "target_field_count":           tgt_f,
+                    "source_section_count":         src_s,
+                    "target_section_count":         tgt_s,
+                    "source_related_list_count":    src_r,
+                    "target_related_list_count":    tgt_r,
+                })
+                continue
+
+            # Parse both XMLs — identical bytes (same org, or layouts copied
+            # between orgs/objects) are parsed once and the result shared
             try:
-                src_data = _parse_layout(src_xml)
-                tgt_data = _parse_layout(tgt_xml)
+                src_data = _parse_layout_cached(src_xml, parse_cache)
+                tgt_data = (src_data if tgt_xml is src_xml
+                            else _parse_layout_cached(tgt_xml, parse_cache))
             except Exception as parse_err:
                 csv_rows.append(_blank_row(name, name, f"Parse Error: {parse_err}"))
                 summary.append({"layout": name, "status": "parse_error", "error": str(parse_err)})
                 continue
 
+            # Same parsed dict on both sides: every diff is empty
+            if tgt_data is src_data:
+                csv_rows.append(_zero_diff_row(name, src_data))
+                summary.append({"layout": name, **_ZERO_DIFF_SUMMARY})
+                continue
+
             diff = _compare(src_data, tgt_data)
+            fm, fe = diff["fields_missing_in_target"], diff["fields_extra_in_target"]
+            sm, se = diff["sections_missing_in_target"], diff["sections_extra_in_target"]
+            rlm, rle = diff["related_lists_missing_in_target"], diff["related_lists_extra_in_target"]
+            n_fm, n_fe, n_sm, n_se, n_rm, n_re = (
+                len(fm), len(fe), len(sm), len(se), len(rlm), len(rle)
+            )
 
-            row = _blank_row(name, name, "Compared")
-            row["Fields Missing in Target"]        = _cell(diff["fields_missing_in_target"])
-            row["Fields Extra in Target"]           = _cell(diff["fields_extra_in_target"])
-            row["Fields Missing Count"]             = len(diff["fields_missing_in_target"])
-            row["Fields Extra Count"]               = len(diff["fields_extra_in_target"])
-            row["Sections Missing in Target"]       = _cell(diff["sections_missing_in_target"])
-            row["Sections Extra in Target"]         = _cell(diff["sections_extra_in_target"])
-            row["Sections Missing Count"]           = len(diff["sections_missing_in_target"])
-            row["Sections Extra Count"]             = len(diff["sections_extra_in_target"])
-            row["Related Lists Missing in Target"]  = _cell(diff["related_lists_missing_in_target"])
-            row["Related Lists Extra in Target"]    = _cell(diff["related_lists_extra_in_target"])
-            row["Related Lists Missing Count"]      = len(diff["related_lists_missing_in_target"])
-            row["Related Lists Extra Count"]        = len(diff["related_lists_extra_in_target"])
-            row["Source Field Count"]               = diff["source_field_count"]
-            row["Target Field Count"]               = diff["target_field_count"]
-            row["Source Section Count"]             = diff["source_section_count"]
-            row["Target Section Count"]             = diff["target_section_count"]
-            row["Source Related List Count"]        = diff["source_related_list_count"]
-            row["Target Related List Count"]        = diff["target_related_list_count"]
-
-            csv_rows.append(row)
+            csv_rows.append((
+                name, name, "Compared",
+                _cell(fm), _cell(fe), n_fm, n_fe,
+                _cell(sm), _cell(se), n_sm, n_se,
+                _cell(rlm), _cell(rle), n_rm, n_re,
+                diff["source_field_count"], diff["target_field_count"],
+                diff["source_section_count"], diff["target_section_count"],
+                diff["source_related_list_count"], diff["target_related_list_count"],
+            ))
             summary.append({
                 "layout":                 name,
                 "status":                 "compared",
-                "fields_missing":         len(diff["fields_missing_in_target"]),
-                "fields_extra":           len(diff["fields_extra_in_target"]),
-                "sections_missing":       len(diff["sections_missing_in_target"]),
-                "sections_extra":         len(diff["sections_extra_in_target"]),
-                "related_lists_missing":  len(diff["related_lists_missing_in_target"]),
-                "related_lists_extra":    len(diff["related_lists_extra_in_target"]),
+                "fields_missing":         n_fm,
+                "fields_extra":           n_fe,
+                "sections_missing":       n_sm,
+                "sections_extra":         n_se,
+                "related_lists_missing":  n_rm,
+                "related_lists_extra":    n_re,
             })
 
         # ── 5. Write CSV ──────────────────────────────────────────────────────
@@ -555,15 +869,20 @@ def compare_page_layouts(
             csv_path = os.path.abspath(output_filename)
         else:
             csv_path = os.path.join(docs_dir, output_filename)
-        _write_csv(csv_rows, csv_path)
+        if async_csv:
+            _csv_pool.submit(csv_rows, csv_path)
+        else:
+            _write_csv(csv_rows, csv_path)
 
-        compared   = [s for s in summary if s["status"] == "compared"]
+        compared   = [s for s in summary if s["status"] in ("compared", "counted")]
         not_found  = [s for s in summary if "not_found" in s.get("status", "")]
         errors     = [s for s in summary if s.get("status") == "parse_error"]
 
         return format_success_response({
-            "message":          f"Compared {len(names)} layout(s). CSV report saved.",
+            "message":          f"Compared {len(names)} layout(s). CSV report "
+                                f"{'queued' if async_csv else 'saved'}.",
             "csv_file":         csv_path,
+            "csv_status":       "writing" if async_csv else "written",
             "total_layouts":    len(names),
             "compared":         len(compared),
             "not_found":        len(not_found),